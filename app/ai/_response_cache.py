@@ -0,0 +1,59 @@
+"""
+BlastShield — in-memory LRU + TTL cache for Bedrock responses.
+
+Keyed by a hash of (model_id, prompt) so identical explanation/patch
+requests (CI retries, PR rescans of the same file) skip the network.
+Shared by explainer and patcher; lives for the Lambda warm container.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 1024
+TTL_SECONDS = 3600
+
+
+def cache_key(model_id: str, prompt: str) -> bytes:
+    """Build the cache key for a model + prompt pair."""
+    return hashlib.sha256((model_id + "\x00" + prompt).encode("utf-8")).digest()
+
+
+class ResponseCache:
+    """Async-safe LRU cache with per-entry TTL.
+
+    Expired entries are dropped lazily on lookup; inserts past capacity
+    evict the least-recently-used entries, so every operation is O(1).
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._store: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: bytes) -> str | None:
+        """Return the cached text for key, or None on miss / expiry."""
+        async with self._lock:
+            entry = self._store.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._store[key]
+                return None
+            self._store.move_to_end(key)
+            return entry[1]
+
+    async def set(self, key: bytes, text: str) -> None:
+        """Store text under key, evicting least-recently-used entries if full."""
+        async with self._lock:
+            self._store[key] = (time.monotonic() + self._ttl, text)
+            self._store.move_to_end(key)
+            while len(self._store) > self._max_entries:
+                self._store.popitem(last=False)
+
+
+# Shared across explainer and patcher
+response_cache = ResponseCache()
@@ -2,70 +2,238 @@
 BlastShield — AWS Bedrock client factory.
 
 Supports two auth modes:
-  1. Bearer token (AWS_BEARER_TOKEN_BEDROCK env var) — direct HTTPS calls
+  1. Bearer token (AWS_BEARER_TOKEN_BEDROCK env var) — pooled keep-alive HTTPS
   2. Standard boto3 IAM credentials — SigV4 signing
+
+Both clients expose `invoke_model_async`, returning {"body": <raw bytes>},
+so explainer/patcher can await them concurrently from the event loop, and
+`invoke_model_stream`, an async iterator over response-stream chunks.
+The client is created once per process (Lambda warm container) so
+TCP + TLS setup is paid only on the first invocation.
 """
 
 from __future__ import annotations
 
-import io
+import asyncio
+import base64
 import json
 import logging
 import os
+import threading
 import urllib.parse
-import urllib.request
+from collections.abc import AsyncIterator
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # optional — stdlib json is the fallback
+    orjson = None
 
 logger = logging.getLogger("blastshield.bedrock")
 
 
+def decode_body(raw: bytes) -> dict:
+    """Parse a Bedrock JSON response body, preferring orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode_json(obj) -> bytes:
+    """Serialize a value straight to UTF-8 JSON bytes, preferring orjson."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+# Placeholder serialized into request envelopes, then split out
+_DYNAMIC_SLOT = "\x00dynamic\x00"
+
+
+def request_envelope(
+    instructions: str, *, max_tokens: int, temperature: float
+) -> tuple[bytes, bytes]:
+    """Pre-serialize an InvokeModel body around the per-request text.
+
+    The prompt is instructions + "\n\n" + dynamic text, sent as a single
+    message string. Returns (prefix, suffix) as bytes; a request body is
+    prefix + encode_json(dynamic_text)[1:-1] + suffix, i.e. the dynamic
+    text's JSON string contents without the surrounding quotes.
+    """
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "messages": [{"role": "user", "content": instructions + "\n\n" + _DYNAMIC_SLOT}],
+    })
+    prefix, suffix = body.encode("utf-8").split(json.dumps(_DYNAMIC_SLOT)[1:-1].encode("utf-8"))
+    return prefix, suffix
+
+
 class BedrockBearerClient:
     """Minimal Bedrock Runtime client using bearer token auth.
 
-    Mimics the boto3 invoke_model interface so explainer/patcher work unchanged.
+    Holds a single httpx.AsyncClient with keep-alive to the regional
+    Bedrock endpoint, so repeated calls reuse the pooled connection.
     """
 
     def __init__(self, token: str, region: str = "us-east-1") -> None:
-        self._token = token
         self._endpoint = f"https://bedrock-runtime.{region}.amazonaws.com"
-
-    def invoke_model(self, *, modelId: str, body: str | bytes) -> dict:
-        """Call Bedrock InvokeModel via HTTPS with bearer token."""
-        encoded_model = urllib.parse.quote(modelId, safe="")
-        url = f"{self._endpoint}/model/{encoded_model}/invoke"
-        if isinstance(body, str):
-            body = body.encode("utf-8")
-
-        req = urllib.request.Request(
-            url,
-            data=body,
+        self._client = httpx.AsyncClient(
+            base_url=self._endpoint,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
             headers={
-                "Authorization": f"Bearer {self._token}",
+                "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             },
-            method="POST",
+            timeout=30,
         )
+        # (modelId, action) → request path; only a handful of models are used
+        self._paths: dict[tuple[str, str], str] = {}
+
+    def _path(self, modelId: str, action: str) -> str:
+        """Build (once per model) the URL path for a runtime action."""
+        key = (modelId, action)
+        path = self._paths.get(key)
+        if path is None:
+            path = self._paths[key] = f"/model/{urllib.parse.quote(modelId, safe='')}/{action}"
+        return path
+
+    async def invoke_model_async(self, *, modelId: str, body: str | bytes) -> dict:
+        """Call Bedrock InvokeModel over the pooled keep-alive connection."""
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
 
         logger.info("Invoking Bedrock model %s via bearer token", modelId)
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = resp.read()
-            return {"body": io.BytesIO(data)}
+        resp = await self._client.post(self._path(modelId, "invoke"), content=body)
+        resp.raise_for_status()
+        return {"body": resp.content}
+
+    async def invoke_model_stream(self, *, modelId: str, body: str | bytes) -> AsyncIterator[bytes]:
+        """Call InvokeModelWithResponseStream, yielding each chunk's JSON payload."""
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+
+        # botocore ships with boto3; its decoder handles framing and CRC checks
+        from botocore.eventstream import EventStreamBuffer
+
+        logger.info("Streaming Bedrock model %s via bearer token", modelId)
+        async with self._client.stream(
+            "POST",
+            self._path(modelId, "invoke-with-response-stream"),
+            content=body,
+            headers={"Accept": "application/vnd.amazon.eventstream"},
+        ) as resp:
+            resp.raise_for_status()
+            buf = EventStreamBuffer()
+            async for data in resp.aiter_bytes():
+                buf.add_data(data)
+                for message in buf:
+                    headers = message.headers
+                    if headers.get(":message-type") == "exception":
+                        raise RuntimeError(
+                            f"Bedrock stream error {headers.get(':exception-type')}: "
+                            f"{message.payload[:200]!r}"
+                        )
+                    yield base64.b64decode(decode_body(message.payload)["bytes"])
+
+
+# Queued by the boto3 stream worker after the last chunk
+_STREAM_END = object()
+
+
+class BedrockBoto3Client:
+    """Async adapter over a boto3 bedrock-runtime client.
+
+    boto3 is blocking, so each call — including reading the streaming
+    response body — runs in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, client) -> None:
+        self._client = client
+
+    async def invoke_model_async(self, *, modelId: str, body: str | bytes) -> dict:
+        """Call Bedrock InvokeModel via boto3 in a worker thread."""
+        logger.info("Invoking Bedrock model %s via boto3", modelId)
+        return await asyncio.to_thread(self._invoke, modelId, body)
+
+    def _invoke(self, modelId: str, body: str | bytes) -> dict:
+        response = self._client.invoke_model(modelId=modelId, body=body)
+        return {"body": response["body"].read()}
+
+    async def invoke_model_stream(self, *, modelId: str, body: str | bytes) -> AsyncIterator[bytes]:
+        """Call InvokeModelWithResponseStream via boto3, yielding chunk payloads.
+
+        boto3's event stream is blocking, so a worker thread reads it and
+        hands each chunk to the event loop through a queue as it arrives.
+        """
+        logger.info("Streaming Bedrock model %s via boto3", modelId)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        worker = asyncio.ensure_future(
+            asyncio.to_thread(self._invoke_stream, modelId, body, loop, queue, stop)
+        )
+        try:
+            while (chunk := await queue.get()) is not _STREAM_END:
+                yield chunk
+            # Re-raise any error the worker hit while reading the stream
+            await worker
+        finally:
+            # Consumer gone early — let the worker close the stream and exit,
+            # and retrieve its outcome so errors aren't reported as unhandled
+            stop.set()
+            worker.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    def _invoke_stream(
+        self,
+        modelId: str,
+        body: str | bytes,
+        loop: asyncio.AbstractEventLoop,
+        queue: asyncio.Queue,
+        stop: threading.Event,
+    ) -> None:
+        try:
+            response = self._client.invoke_model_with_response_stream(modelId=modelId, body=body)
+            stream = response["body"]
+            for event in stream:
+                if stop.is_set():
+                    stream.close()
+                    return
+                if "chunk" in event:
+                    loop.call_soon_threadsafe(queue.put_nowait, event["chunk"]["bytes"])
+        finally:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+
+# Process-wide client — created on first use, reused across requests
+_client = None
 
 
 def get_bedrock_client():
-    """Create a Bedrock Runtime client.
+    """Return the process-wide Bedrock Runtime client.
 
     Uses bearer token if AWS_BEARER_TOKEN_BEDROCK is set,
     otherwise falls back to standard boto3 credential chain.
     """
+    global _client
+    if _client is not None:
+        return _client
+
     region = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")
     token = os.environ.get("AWS_BEARER_TOKEN_BEDROCK", "").strip()
 
     if token:
         logger.info("Using Bedrock bearer token auth (region=%s)", region)
-        return BedrockBearerClient(token, region)
+        _client = BedrockBearerClient(token, region)
+        return _client
 
     # Fallback to boto3 SigV4
     import boto3
     logger.info("Using boto3 IAM auth for Bedrock (region=%s)", region)
-    return boto3.client("bedrock-runtime", region_name=region)
+    _client = BedrockBoto3Client(boto3.client("bedrock-runtime", region_name=region))
+    return _client
@@ -4,8 +4,11 @@ BlastShield — AI-powered risk explanation via Bedrock Claude.
 
 from __future__ import annotations
 
-import json
 import logging
+from collections.abc import AsyncIterator
+
+from app.ai._response_cache import cache_key, response_cache
+from app.ai.bedrock import decode_body, encode_json, request_envelope
 
 logger = logging.getLogger("blastshield.explainer")
 
@@ -20,37 +23,99 @@ FALLBACK_EXPLANATION = (
     "infinite loop can take down an entire production environment."
 )
 
+# Static instructions, sent ahead of the per-risk details in every prompt
+EXPLAIN_INSTRUCTIONS = (
+    "Explain this Python infinite loop risk in 80-120 words for a junior developer. "
+    "Clearly describe a realistic production outage scenario (e.g., CPU exhaustion, "
+    "service unavailability, scaling failure). Use simple English. "
+    "End with one sentence on why this matters in production."
+)
 
-async def generate_explanation(client, risk: dict, code_snippet: str) -> str:
-    """Ask Bedrock Claude to explain a detected risk in simple English.
+# Request body serialized once; only the per-risk details are encoded per call
+_BODY_PREFIX, _BODY_SUFFIX = request_envelope(
+    EXPLAIN_INSTRUCTIONS, max_tokens=300, temperature=0.5
+)
 
-    Returns a static fallback string if Bedrock is unavailable or errors.
-    """
-    prompt = (
-        "Explain this Python infinite loop risk in 80-120 words for a junior developer. "
-        "Clearly describe a realistic production outage scenario (e.g., CPU exhaustion, "
-        "service unavailability, scaling failure). Use simple English. "
-        "End with one sentence on why this matters in production.\n\n"
+
+def _explain_details(risk: dict, code_snippet: str) -> str:
+    """Per-risk prompt suffix appended after EXPLAIN_INSTRUCTIONS."""
+    return (
         f"Evidence: {risk['evidence']}\n"
         f"Lines {risk['line_start']}-{risk['line_end']}\n\n"
         f"Code:\n```python\n{code_snippet}\n```"
     )
 
+
+async def generate_explanation(client, risk: dict, code_snippet: str) -> str:
+    """Ask Bedrock Claude to explain a detected risk in simple English.
+
+    Returns a static fallback string if Bedrock is unavailable or errors.
+    """
+    details = _explain_details(risk, code_snippet)
+
+    key = cache_key(MODEL_ID, EXPLAIN_INSTRUCTIONS + "\n\n" + details)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        logger.info("Bedrock explanation served from cache")
+        return cached
+
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "temperature": 0.5,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-
-        response = client.invoke_model(modelId=MODEL_ID, body=body)
-        raw = response["body"].read()
-        result = json.loads(raw)
+        body = _BODY_PREFIX + encode_json(details)[1:-1] + _BODY_SUFFIX
+
+        response = await client.invoke_model_async(modelId=MODEL_ID, body=body)
+        raw = response["body"]
+        result = decode_body(raw)
         logger.info("Bedrock explanation response received")
         text = result["content"][0]["text"].strip()
-        return text if text else FALLBACK_EXPLANATION
+        if not text:
+            return FALLBACK_EXPLANATION
+        await response_cache.set(key, text)
+        return text
 
     except Exception:
         logger.warning("Bedrock explanation failed — using fallback", exc_info=True)
         return FALLBACK_EXPLANATION
+
+
+async def stream_explanation(client, risk: dict, code_snippet: str) -> AsyncIterator[str]:
+    """Stream a Bedrock Claude explanation as text deltas.
+
+    Yields the cached text in one piece on a cache hit, and the static
+    fallback if Bedrock fails before producing any text. A failure after
+    text has been yielded is re-raised so callers know it is incomplete.
+    """
+    details = _explain_details(risk, code_snippet)
+
+    key = cache_key(MODEL_ID, EXPLAIN_INSTRUCTIONS + "\n\n" + details)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        logger.info("Bedrock explanation served from cache")
+        yield cached
+        return
+
+    parts: list[str] = []
+    complete = False
+    try:
+        body = _BODY_PREFIX + encode_json(details)[1:-1] + _BODY_SUFFIX
+
+        async for chunk in client.invoke_model_stream(modelId=MODEL_ID, body=body):
+            event = decode_body(chunk)
+            if event.get("type") != "content_block_delta":
+                continue
+            text = event["delta"].get("text", "")
+            if text:
+                parts.append(text)
+                yield text
+        complete = True
+
+    except Exception:
+        logger.warning("Bedrock explanation stream failed", exc_info=True)
+        if parts:
+            raise
+
+    text = "".join(parts).strip()
+    if not text:
+        yield FALLBACK_EXPLANATION
+    elif complete:
+        logger.info("Bedrock explanation stream completed")
+        await response_cache.set(key, text)
@@ -8,46 +8,70 @@ Guarantees a non-empty unified diff when a risk is detected:
 
 from __future__ import annotations
 
-import json
 import logging
+import re
+
+from app.ai._response_cache import cache_key, response_cache
+from app.ai.bedrock import decode_body, encode_json, request_envelope
 
 logger = logging.getLogger("blastshield.patcher")
 
 MODEL_ID = "anthropic.claude-3-5-sonnet-20241022-v2:0"
 
+# Static instructions, sent ahead of the per-risk details in every prompt
+PATCH_INSTRUCTIONS = (
+    "Generate the smallest unified diff patch that fixes this infinite loop risk. "
+    "Add a safety counter or break condition. Output ONLY the unified diff, "
+    "starting with --- and +++. No explanation, no markdown fences."
+)
+
+# Markdown fence lines (```diff, ```) the model sometimes wraps diffs in
+_FENCE_RE = re.compile(r"^```.*(?:\n|$)", re.MULTILINE)
+
+# Request body serialized once; only the per-risk details are encoded per call
+_BODY_PREFIX, _BODY_SUFFIX = request_envelope(
+    PATCH_INSTRUCTIONS, max_tokens=300, temperature=0.3
+)
+
+
+# Static fallback diffs — {ls} is the first line, {old}/{new} the hunk lengths
+_WHILE_TRUE_TEMPLATE = (
+    "--- original\n"
+    "+++ fixed\n"
+    "@@ -{ls},{old} +{ls},{new} @@\n"
+    "+counter = 0\n"
+    " while True:\n"
+    "+    if counter >= 1000:\n"
+    "+        break\n"
+    "     ...\n"
+    "+    counter += 1\n"
+)
+
+_INFINITE_ITER_TEMPLATE = (
+    "--- original\n"
+    "+++ fixed\n"
+    "@@ -{ls},{old} +{ls},{new} @@\n"
+    "+_iter_count = 0\n"
+    " for ... in itertools.count(...):\n"
+    "+    _iter_count += 1\n"
+    "+    if _iter_count >= 1000:\n"
+    "+        break\n"
+    "     ...\n"
+)
+
 
 def _static_patch_while_true(risk: dict) -> str:
     """Deterministic safety-counter patch for while True loops."""
     ls = risk["line_start"]
-    le = risk["line_end"]
-    return (
-        "--- original\n"
-        "+++ fixed\n"
-        f"@@ -{ls},{le - ls + 1} +{ls},{le - ls + 4} @@\n"
-        "+counter = 0\n"
-        " while True:\n"
-        "+    if counter >= 1000:\n"
-        "+        break\n"
-        "     ...\n"
-        "+    counter += 1\n"
-    )
+    span = risk["line_end"] - ls
+    return _WHILE_TRUE_TEMPLATE.format(ls=ls, old=span + 1, new=span + 4)
 
 
 def _static_patch_infinite_iter(risk: dict) -> str:
     """Deterministic break-after-N patch for infinite iterators."""
     ls = risk["line_start"]
-    le = risk["line_end"]
-    return (
-        "--- original\n"
-        "+++ fixed\n"
-        f"@@ -{ls},{le - ls + 1} +{ls},{le - ls + 4} @@\n"
-        "+_iter_count = 0\n"
-        " for ... in itertools.count(...):\n"
-        "+    _iter_count += 1\n"
-        "+    if _iter_count >= 1000:\n"
-        "+        break\n"
-        "     ...\n"
-    )
+    span = risk["line_end"] - ls
+    return _INFINITE_ITER_TEMPLATE.format(ls=ls, old=span + 1, new=span + 4)
 
 
 def _get_static_patch(risk: dict) -> str:
@@ -63,37 +87,34 @@ async def generate_patch(client, risk: dict, code: str) -> str:
 
     GUARANTEES a non-empty patch string when called (falls back to static).
     """
-    prompt = (
-        "Generate the smallest unified diff patch that fixes this infinite loop risk. "
-        "Add a safety counter or break condition. Output ONLY the unified diff, "
-        "starting with --- and +++. No explanation, no markdown fences.\n\n"
+    details = (
         f"Evidence: {risk['evidence']}\n"
         f"Lines {risk['line_start']}-{risk['line_end']}\n\n"
         f"Full source:\n```python\n{code}\n```"
     )
 
+    key = cache_key(MODEL_ID, PATCH_INSTRUCTIONS + "\n\n" + details)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        logger.info("Bedrock patch served from cache")
+        return cached
+
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "temperature": 0.3,
-            "messages": [{"role": "user", "content": prompt}],
-        })
-
-        response = client.invoke_model(modelId=MODEL_ID, body=body)
-        raw = response["body"].read()
-        result = json.loads(raw)
+        body = _BODY_PREFIX + encode_json(details)[1:-1] + _BODY_SUFFIX
+
+        response = await client.invoke_model_async(modelId=MODEL_ID, body=body)
+        raw = response["body"]
+        result = decode_body(raw)
         logger.info("Bedrock patch response received")
         patch_text = result["content"][0]["text"].strip()
 
         # Strip markdown fences if model wrapped the diff
         if patch_text.startswith("```"):
-            lines = patch_text.splitlines()
-            lines = [l for l in lines if not l.startswith("```")]
-            patch_text = "\n".join(lines).strip()
+            patch_text = _FENCE_RE.sub("", patch_text).strip()
 
         # Validate: must look like a diff
         if "---" in patch_text or "@@" in patch_text or patch_text.startswith("diff"):
+            await response_cache.set(key, patch_text)
             return patch_text
 
         logger.warning("Bedrock patch not valid diff format — using static fallback")
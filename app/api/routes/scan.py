@@ -1,21 +1,26 @@
 """
-BlastShield — POST /scan endpoint.
+BlastShield — POST /scan and POST /scan/stream endpoints.
 
 Accepts {"code": str}, parses with tree-sitter, detects infinite loops,
 scores the risk, and enriches with Bedrock AI explanation + patch.
+/scan/stream emits the same result as newline-delimited JSON events so the
+explanation can be shown while it is still being generated.
 """
 
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.ai.bedrock import get_bedrock_client
-from app.ai.explainer import FALLBACK_EXPLANATION, generate_explanation
-from app.ai.patcher import generate_patch
+from app.ai.explainer import FALLBACK_EXPLANATION, generate_explanation, stream_explanation
+from app.ai.patcher import _get_static_patch, generate_patch
 from app.core.parser import PythonParser
 from app.core.rules.infinite_loop import detect_infinite_loops
 from app.core.scorer import calculate_score
@@ -49,57 +54,64 @@ _SAFE_FALLBACK = ScanResponse(
 )
 
 
-@router.post("/scan", response_model=ScanResponse)
-async def scan_code(req: ScanRequest):
-    """Scan Python code for infinite loop risks."""
+def _analyze(code: str) -> tuple[list[dict], str | None]:
+    """Parse and run detection rules.
+
+    Returns (risks, message). When there is nothing for Bedrock to enrich
+    (empty file, syntax error, no risks) risks is empty and message is the
+    explanation to return. Raises HTTPException for oversized input.
+    """
+    # Early exit for empty files (e.g., __init__.py)
+    if not code.strip():
+        return [], "File is empty. No risks detected."
+
+    # Input size guard
+    if len(code) > MAX_CODE_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Code exceeds maximum length of {MAX_CODE_LENGTH} characters",
+        )
+
+    # Parse
     try:
-        # Early exit for empty files (e.g., __init__.py)
-        if not req.code.strip():
-            return ScanResponse(
-                risk_score=0,
-                risks=[],
-                explanation="File is empty. No risks detected.",
-                suggested_patch="",
-            )
+        tree, source_bytes = _parser.parse(code)
+    except ValueError:
+        return [], "Syntax error: Could not parse this Python file."
 
-        # Input size guard
-        if len(req.code) > MAX_CODE_LENGTH:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Code exceeds maximum length of {MAX_CODE_LENGTH} characters",
-            )
+    # Detect
+    risks = detect_infinite_loops(tree, source_bytes)
 
-        # Parse
-        try:
-            tree, source_bytes = _parser.parse(req.code)
-        except ValueError:
-            return ScanResponse(
-                risk_score=0,
-                risks=[],
-                explanation="Syntax error: Could not parse this Python file.",
-                suggested_patch="",
-            )
+    # No risks → clean result
+    if not risks:
+        return [], "No infinite loop risks detected. Code looks safe."
+    return risks, None
 
-        # Detect
-        risks = detect_infinite_loops(tree, source_bytes)
-        risk_score = calculate_score(risks)
 
-        # No risks → clean result
-        if not risks:
+def _snippet(code: str, risk: dict) -> str:
+    """Source lines spanned by a risk; the split stops at the risk's last line."""
+    lines = code.split("\n", risk["line_end"])[risk["line_start"] - 1 : risk["line_end"]]
+    return "\n".join(line.removesuffix("\r") for line in lines)
+
+
+@router.post("/scan", response_model=ScanResponse)
+async def scan_code(req: ScanRequest):
+    """Scan Python code for infinite loop risks."""
+    try:
+        risks, message = _analyze(req.code)
+        if message is not None:
             return ScanResponse(
                 risk_score=0,
                 risks=[],
-                explanation="No infinite loop risks detected. Code looks safe.",
+                explanation=message,
                 suggested_patch="",
             )
+        risk_score = calculate_score(risks)
 
         # Enrich with Bedrock AI
+        first = risks[0]
         try:
             client = get_bedrock_client()
-            lines = req.code.splitlines()
-            first = risks[0]
-            snippet_lines = lines[first["line_start"] - 1 : first["line_end"]]
-            snippet = "\n".join(snippet_lines)
+            snippet = _snippet(req.code, first)
 
             explanation, patch = await asyncio.gather(
                 generate_explanation(client, first, snippet),
@@ -109,7 +121,6 @@ async def scan_code(req: ScanRequest):
             logger.warning("Bedrock unavailable — using fallback", exc_info=True)
             explanation = FALLBACK_EXPLANATION
             # Still guarantee a non-empty patch via static fallback
-            from app.ai.patcher import _get_static_patch
             patch = _get_static_patch(first)
 
         return ScanResponse(
@@ -124,3 +135,59 @@ async def scan_code(req: ScanRequest):
     except Exception:
         logger.exception("Unexpected scan error")
         return _SAFE_FALLBACK
+
+
+def _event(kind: str, **data) -> str:
+    """Serialize one NDJSON stream event."""
+    return json.dumps({"event": kind, **data}) + "\n"
+
+
+async def _scan_events(code: str, risks: list[dict], message: str | None) -> AsyncIterator[str]:
+    """Yield `risks`, then `explanation` deltas, then a final `patch` event.
+
+    An `error` event precedes the patch if the explanation stream broke
+    off part-way, so clients know the text they have is incomplete.
+    """
+    yield _event("risks", risk_score=calculate_score(risks), risks=risks)
+    if message is not None:
+        yield _event("explanation", text=message)
+        yield _event("patch", suggested_patch="")
+        return
+
+    first = risks[0]
+    try:
+        client = get_bedrock_client()
+    except Exception:
+        logger.warning("Bedrock unavailable — using fallback", exc_info=True)
+        yield _event("explanation", text=FALLBACK_EXPLANATION)
+        yield _event("patch", suggested_patch=_get_static_patch(first))
+        return
+
+    # Start the patch first so it generates while the explanation streams
+    patch_task = asyncio.create_task(generate_patch(client, first, code))
+    try:
+        try:
+            async for text in stream_explanation(client, first, _snippet(code, first)):
+                yield _event("explanation", text=text)
+        except Exception:
+            yield _event("error", detail="Explanation stream interrupted; text is incomplete")
+        yield _event("patch", suggested_patch=await patch_task)
+    finally:
+        patch_task.cancel()
+
+
+@router.post("/scan/stream")
+async def scan_code_stream(req: ScanRequest):
+    """Scan Python code, streaming the explanation as NDJSON events."""
+    try:
+        risks, message = _analyze(req.code)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Unexpected scan error")
+        risks, message = [], _SAFE_FALLBACK.explanation
+
+    return StreamingResponse(
+        _scan_events(req.code, risks, message),
+        media_type="application/x-ndjson",
+    )
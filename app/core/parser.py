@@ -4,6 +4,8 @@ BlastShield — Python source parser using tree-sitter.
 
 from __future__ import annotations
 
+import threading
+
 import tree_sitter_python as tspython
 from tree_sitter import Language, Parser
 
@@ -12,10 +14,16 @@ PY_LANGUAGE = Language(tspython.language())
 
 
 class PythonParser:
-    """Thin wrapper around tree-sitter for Python source code."""
+    """Thin wrapper around tree-sitter for Python source code.
+
+    The underlying tree-sitter Parser is not thread-safe, so each thread
+    lazily gets its own, reused for every parse on that thread. The scan
+    routes parse on the event-loop thread, so today that is a single
+    Parser; worker-thread callers get their own instead of sharing it.
+    """
 
     def __init__(self) -> None:
-        self._parser = Parser(PY_LANGUAGE)
+        self._local = threading.local()
 
     def parse(self, code: str) -> tuple:
         """Parse Python source and return (tree, source_bytes).
@@ -23,7 +31,14 @@ class PythonParser:
         Raises ValueError if the code cannot be parsed.
         """
         source_bytes = code.encode("utf-8")
-        tree = self._parser.parse(source_bytes)
+        tree = self._thread_parser().parse(source_bytes)
         if tree.root_node.has_error:
             raise ValueError("Failed to parse Python source code")
         return tree, source_bytes
+
+    def _thread_parser(self) -> Parser:
+        """Return this thread's tree-sitter Parser, creating it on first use."""
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = Parser(PY_LANGUAGE)
+        return parser
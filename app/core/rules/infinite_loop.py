@@ -1,18 +1,52 @@
 """
 BlastShield — Infinite loop detection rule.
 
-Walks the tree-sitter AST to find:
+Matches candidate loops with a compiled tree-sitter query to find:
   1. `while True` without break / return / raise in body
   2. `for` over known infinite iterators (itertools.count, itertools.repeat, iter(int,1))
 """
 
 from __future__ import annotations
 
-from tree_sitter import Node, Tree
+import re
 
+from tree_sitter import Node, Query, QueryCursor, Tree
 
-# itertools calls that produce infinite iterators
-_INFINITE_ITERATORS = {"count", "repeat"}
+from app.core.parser import PY_LANGUAGE
+
+
+# Call targets that produce infinite iterators, as name-segment tuples:
+# itertools.count() / itertools.repeat(), or bare after `from itertools import ...`
+_INFINITE_ITERATORS = frozenset({
+    (b"itertools", b"count"),
+    (b"itertools", b"repeat"),
+    (b"count",),
+    (b"repeat",),
+})
+
+# Statements that leave a loop body
+_EXIT_TYPES = ("break_statement", "return_statement", "raise_statement")
+
+# Nested function scopes — their return/raise only run when called, never leaving
+# an enclosing loop (class bodies run in place, so they are not listed)
+_SCOPE_TYPES = ("function_definition", "lambda")
+
+# Candidate loops, matched in C; conditions and call targets are checked in Python
+_LOOP_QUERY = Query(
+    PY_LANGUAGE,
+    """
+    (while_statement) @loop
+    (for_statement right: (call)) @loop
+    """,
+)
+
+# Source with neither keyword cannot contain a loop
+_LOOP_KEYWORD_RE = re.compile(rb"\b(?:while|for)\b")
+
+
+def applies(source: bytes) -> bool:
+    """Cheap pre-filter: can this source contain a loop at all?"""
+    return _LOOP_KEYWORD_RE.search(source) is not None
 
 
 def _node_text(node: Node, source: bytes) -> str:
@@ -20,21 +54,26 @@ def _node_text(node: Node, source: bytes) -> str:
     return source[node.start_byte:node.end_byte].decode("utf-8", errors="replace")
 
 
-def _has_exit_statement(node: Node) -> bool:
-    """Check whether a node's subtree contains break / return / raise."""
-    if node.type in ("break_statement", "return_statement", "raise_statement"):
-        return True
-    for child in node.children:
-        if _has_exit_statement(child):
-            return True
-    return False
-
-
 def _is_true_literal(node: Node, source: bytes) -> bool:
     """Check if a node is the boolean literal True."""
     return node.type == "true" or _node_text(node, source) == "True"
 
 
+def _call_target(func: Node, source: bytes) -> tuple[bytes, ...]:
+    """Name segments of a call target: `f` → (b"f",), `m.f` → (b"m", b"f")."""
+    if func.type == "identifier":
+        return (source[func.start_byte:func.end_byte],)
+    if func.type == "attribute":
+        obj = func.child_by_field_name("object")
+        attr = func.child_by_field_name("attribute")
+        if obj is not None and attr is not None and obj.type == "identifier":
+            return (
+                source[obj.start_byte:obj.end_byte],
+                source[attr.start_byte:attr.end_byte],
+            )
+    return ()
+
+
 def _is_infinite_iterator_call(node: Node, source: bytes) -> bool:
     """Check if a node is a call to a known infinite iterator."""
     if node.type != "call":
@@ -42,66 +81,100 @@ def _is_infinite_iterator_call(node: Node, source: bytes) -> bool:
     func = node.child_by_field_name("function")
     if func is None:
         return False
-    text = _node_text(func, source)
-    # itertools.count() / itertools.repeat()
-    if "." in text:
-        parts = text.rsplit(".", 1)
-        if parts[0] in ("itertools",) and parts[1] in _INFINITE_ITERATORS:
-            return True
-    # bare count() / repeat() after `from itertools import count`
-    if text in _INFINITE_ITERATORS:
+    target = _call_target(func, source)
+    if target in _INFINITE_ITERATORS:
         return True
     # iter(int, 1) sentinel form
-    if text == "iter" and node.child_by_field_name("arguments"):
+    if target == (b"iter",):
         args = node.child_by_field_name("arguments")
+        if args is None:
+            return False
         # iter(callable, sentinel) has 2 args → infinite
-        arg_nodes = [c for c in args.children if c.type not in ("(", ")", ",")]
-        if len(arg_nodes) == 2:
-            return True
+        return args.named_child_count == 2
     return False
 
 
+def _while_risk(node: Node, source: bytes) -> dict | None:
+    """`while True` whose body has no exit."""
+    condition = node.child_by_field_name("condition")
+    if not (condition and _is_true_literal(condition, source)):
+        return None
+    return {
+        "line_start": node.start_point[0] + 1,
+        "line_end": node.end_point[0] + 1,
+        "evidence": (
+            "`while True` loop without break/return/raise — "
+            "will run indefinitely and exhaust CPU"
+        ),
+    }
+
+
+def _for_risk(node: Node, source: bytes) -> dict | None:
+    """`for` over an infinite iterator whose body has no exit."""
+    iter_node = node.child_by_field_name("right")
+    if not (iter_node and _is_infinite_iterator_call(iter_node, source)):
+        return None
+    return {
+        "line_start": node.start_point[0] + 1,
+        "line_end": node.end_point[0] + 1,
+        "evidence": (
+            f"`for` loop over infinite iterator "
+            f"`{_node_text(iter_node, source)}` without break — "
+            "will never terminate"
+        ),
+    }
+
+
+# Loop node type → risk check; a risk is reported when the body has no exit
+_LOOP_CHECKS = {
+    "while_statement": _while_risk,
+    "for_statement": _for_risk,
+}
+
+
+def _body_has_exit(body: Node) -> bool:
+    """Check whether a loop body contains break / return / raise.
+
+    Cursor walk that stops at the first exit and does not descend into
+    nested def / lambda, whose exits never leave the loop.
+    """
+    cursor = body.walk()
+    exit_types = _EXIT_TYPES
+    scope_types = _SCOPE_TYPES
+
+    while True:
+        node_type = cursor.node.type
+        if node_type in exit_types:
+            return True
+        if node_type not in scope_types and cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return False
+
+
 def detect_infinite_loops(tree: Tree, source: bytes) -> list[dict]:
     """Detect potential infinite loops in a parsed Python AST.
 
+    Candidate loops come from one compiled query run in C; only their
+    bodies are walked in Python, so loop-free code costs a single query.
+
     Returns a list of dicts with keys: line_start, line_end, evidence.
     """
+    if not applies(source):
+        return []
+
     risks: list[dict] = []
+    loops = QueryCursor(_LOOP_QUERY).captures(tree.root_node).get("loop", [])
+    # Outer loops precede inner ones
+    loops.sort(key=lambda node: node.start_byte)
+
+    for node in loops:
+        risk = _LOOP_CHECKS[node.type](node, source)
+        if risk is None:
+            continue
+        body = node.child_by_field_name("body")
+        if body is not None and not _body_has_exit(body):
+            risks.append(risk)
 
-    def _walk(node: Node) -> None:
-        # --- while True without exit ---
-        if node.type == "while_statement":
-            condition = node.child_by_field_name("condition")
-            body = node.child_by_field_name("body")
-            if condition and _is_true_literal(condition, source):
-                if body and not _has_exit_statement(body):
-                    risks.append({
-                        "line_start": node.start_point[0] + 1,
-                        "line_end": node.end_point[0] + 1,
-                        "evidence": (
-                            "`while True` loop without break/return/raise — "
-                            "will run indefinitely and exhaust CPU"
-                        ),
-                    })
-
-        # --- for over infinite iterator ---
-        if node.type == "for_statement":
-            iter_node = node.child_by_field_name("right")
-            body = node.child_by_field_name("body")
-            if iter_node and _is_infinite_iterator_call(iter_node, source):
-                if body and not _has_exit_statement(body):
-                    risks.append({
-                        "line_start": node.start_point[0] + 1,
-                        "line_end": node.end_point[0] + 1,
-                        "evidence": (
-                            f"`for` loop over infinite iterator "
-                            f"`{_node_text(iter_node, source)}` without break — "
-                            "will never terminate"
-                        ),
-                    })
-
-        for child in node.children:
-            _walk(child)
-
-    _walk(tree.root_node)
     return risks